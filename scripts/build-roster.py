@@ -7,12 +7,17 @@ show up under their current call even before the sheet is updated.
 """
 
 import csv
+import gzip
+import hashlib
 import io
 import os
+import re
 import sys
 import time
+import urllib.error
 import urllib.request
 from datetime import datetime, timezone
+from html import escape as html_escape
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from qrz import QRZClient, QRZError, cache_entry, load_cache, save_cache
@@ -20,71 +25,152 @@ from qrz import QRZClient, QRZError, cache_entry, load_cache, save_cache
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CACHE_FILE = os.path.join(ROOT, "data", "qrz_cache.json")
 
+# Last fetched sheet CSV plus its validators, so unchanged sheets come back
+# as a 304 without a body. ROSTER_CACHE_DIR lets the deploy keep this outside
+# the published tree.
+CSV_CACHE_DIR = os.environ.get("ROSTER_CACHE_DIR") or os.path.join(ROOT, ".cache")
+CSV_CACHE_FILE = os.path.join(CSV_CACHE_DIR, "roster.csv")
+ETAG_FILE = os.path.join(CSV_CACHE_DIR, "roster.etag")
+LAST_MODIFIED_FILE = os.path.join(CSV_CACHE_DIR, "roster.lastmod")
+DIGEST_FILE = os.path.join(CSV_CACHE_DIR, "roster.sha256")
+
+OUTPUT_FILE = os.path.join(ROOT, "roster.html")
+
 SHEET_CSV_URL = (
     "https://docs.google.com/spreadsheets/d/e/"
     "2PACX-1vRBfNWrtgvUxTJQL96aK4g7ctZZ-Z572mBEbsscarGQWrbHg66yfxf-Jxw-bZ1ke7KX0zhJk6nUFWhL"
     "/pub?output=csv"
 )
 
+TECH_GUY_CALL = "W6JSV"
+
 MONTHS = [
     "Jan", "Feb", "Mar", "Apr", "May", "Jun",
     "Jul", "Aug", "Sep", "Oct", "Nov", "Dec",
 ]
 
+_DATE_RE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{2,4})")
+
 
 def format_date(date_str: str) -> str:
     """Convert MM/DD/YYYY to 'Mon DD, YYYY'."""
-    parts = date_str.split("/")
-    if len(parts) != 3:
+    m = _DATE_RE.fullmatch(date_str)
+    if not m:
         return date_str
-    try:
-        month = int(parts[0]) - 1
-        day = int(parts[1])
-        year = parts[2]
-        if 0 <= month < 12:
-            return f"{MONTHS[month]} {day}, {year}"
-    except ValueError:
-        pass
+    month, day, year = m.groups()
+    month = int(month)
+    if 1 <= month <= 12:
+        return MONTHS[month - 1] + " " + str(int(day)) + ", " + year
     return date_str
 
 
-def html_escape(text: str) -> str:
-    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+def _read_text(path: str) -> str:
+    try:
+        with open(path, encoding="utf-8", newline="") as f:
+            return f.read()
+    except (OSError, ValueError):  # missing or not valid UTF-8: a cache miss
+        return ""
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
 
 
 def fetch_csv() -> str:
-    req = urllib.request.Request(SHEET_CSV_URL, headers={"User-Agent": "QRQCrew-Roster-Builder/1.0"})
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        return resp.read().decode("utf-8")
+    """Download the sheet CSV, reusing the cached copy when the server says
+    it hasn't changed (conditional GET on ETag / Last-Modified)."""
+    headers = {"User-Agent": "QRQCrew-Roster-Builder/1.0", "Accept-Encoding": "gzip"}
+    cached = _read_text(CSV_CACHE_FILE)
+    if cached:
+        etag = _read_text(ETAG_FILE).strip()
+        last_modified = _read_text(LAST_MODIFIED_FILE).strip()
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    req = urllib.request.Request(SHEET_CSV_URL, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            body = resp.read()
+            if resp.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            etag = resp.headers.get("ETag") or ""
+            last_modified = resp.headers.get("Last-Modified") or ""
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached:
+            print("Roster CSV not modified; using cached copy")
+            return cached
+        raise
+
+    # Decode before caching so a bad body can't poison later runs.
+    csv_text = body.decode("utf-8")
+    _write_atomic(CSV_CACHE_FILE, body)
+    _write_atomic(ETAG_FILE, etag.encode("utf-8"))
+    _write_atomic(LAST_MODIFIED_FILE, last_modified.encode("utf-8"))
+    return csv_text
+
+
+def roster_digest(csv_text: str) -> str:
+    """Fingerprint of everything roster.html is rendered from: the sheet CSV,
+    the QRZ cache and whether QRZ credentials are set (callsign changes), and
+    this script (the template)."""
+    h = hashlib.sha256(csv_text.encode("utf-8"))
+    h.update(b"qrz" if QRZClient.from_env() is not None else b"no-qrz")
+    for path in (CACHE_FILE, os.path.abspath(__file__)):
+        try:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        except OSError:
+            pass
+    return h.hexdigest()
 
 
 def parse_members(csv_text: str) -> list[dict]:
-    lines = csv_text.splitlines()
-
-    # Find header row containing "Callsign"
-    header_idx = -1
-    for i, line in enumerate(lines):
-        if "Callsign" in line:
-            header_idx = i
-            break
-    if header_idx == -1:
+    # Skip any title rows above the header row containing "Callsign" by
+    # slicing from the start of that line, then parse only from there.
+    idx = csv_text.find("Callsign")
+    if idx < 0:
         return []
+    start = csv_text.rfind("\n", 0, idx) + 1
+    reader = csv.reader(io.StringIO(csv_text[start:]))
+    header = next(reader)
 
-    # Parse data rows after header
-    data_text = "\n".join(lines[header_idx:])
-    reader = csv.DictReader(io.StringIO(data_text))
+    # Callsign and QC # are required; Name and Join Date render blank if the
+    # sheet ever drops or renames them.
+    try:
+        ci, qi = header.index("Callsign"), header.index("QC #")
+    except ValueError:
+        return []
+    ni = header.index("Name") if "Name" in header else None
+    ji = header.index("Join Date") if "Join Date" in header else None
+    last = max(ci, qi)
 
     members = []
     for row in reader:
-        callsign = row.get("Callsign", "").strip()
-        name = row.get("Name", "").strip()
-        join_date = row.get("Join Date", "").strip()
+        if len(row) <= last:
+            continue
+        callsign = row[ci].strip()
+        name = row[ni].strip() if ni is not None and ni < len(row) else ""
+        join_date = row[ji].strip() if ji is not None and ji < len(row) else ""
         try:
-            qc_number = int(row.get("QC #", "0").strip())
+            qc_number = int(row[qi].strip())
         except ValueError:
             qc_number = 0
 
-        if callsign.upper() == "K2EJT":
+        call = callsign.upper()
+        if call == "K2EJT":
             continue
         if callsign and qc_number:
             members.append({
@@ -92,6 +178,7 @@ def parse_members(csv_text: str) -> list[dict]:
                 "name": name,
                 "join_date": join_date,
                 "qc_number": qc_number,
+                "is_tech_guy": call == TECH_GUY_CALL,
             })
 
     members.sort(key=lambda m: m["qc_number"])
@@ -126,44 +213,63 @@ def resolve_callsign_changes(members: list[dict]) -> list[dict]:
         if current and current != call:
             print(f"Callsign change from QRZ: {call} -> {current}")
             member["callsign"] = current
+            member["is_tech_guy"] = current == TECH_GUY_CALL
 
     if dirty:
         save_cache(CACHE_FILE, cache)
     return members
 
 
+_FOUNDER_BADGE = '<span class="founder-badge">Founder</span>'
+_TECH_BADGE = '<span class="tech-badge">Resident Computer Guy</span>'
+
+# QC # -> (row class, badge) for the founding members.
+_STYLES = {
+    1: ("founder", _FOUNDER_BADGE),
+    2: ("founder", _FOUNDER_BADGE),
+    3: ("founder", _FOUNDER_BADGE),
+}
+_TECH_GUY = ("tech-guy", _TECH_BADGE)
+_NO_BADGE = ("", "")
+
+# Fixed pieces of a roster row, joined around the per-member values.
+_ROW_OPEN = '                <div class="member-row '
+_ROW_QC = '">\n                    <span class="qc-number">QC #'
+_ROW_CALL = (
+    '</span>\n'
+    '                    <span class="callsign">\n'
+    '                        <a href="https://www.qrz.com/db/'
+)
+_ROW_LINK = '" target="_blank" rel="noopener">'
+_ROW_NAME = '</a>\n                    </span>\n                    <span class="name">'
+_ROW_DATE = '</span>\n                    <span class="join-date">'
+_ROW_CLOSE = '</span>\n                </div>'
+
+
 def render_member_row(member: dict) -> str:
     qc = member["qc_number"]
     callsign = html_escape(member["callsign"])
     name = html_escape(member["name"])
     date = html_escape(format_date(member["join_date"]))
 
-    row_class = ""
-    badge = ""
-    if qc <= 3:
-        row_class = "founder"
-        badge = '<span class="founder-badge">Founder</span>'
-    elif member["callsign"].upper() == "W6JSV":
-        row_class = "tech-guy"
-        badge = '<span class="tech-badge">Resident Computer Guy</span>'
-
-    return f"""                <div class="member-row {row_class}">
-                    <span class="qc-number">QC #{qc}</span>
-                    <span class="callsign">
-                        <a href="https://www.qrz.com/db/{callsign}" target="_blank" rel="noopener">{callsign}</a>
-                    </span>
-                    <span class="name">{name}{badge}</span>
-                    <span class="join-date">{date}</span>
-                </div>"""
+    row_class, badge = _STYLES.get(qc) or (
+        _TECH_GUY if member["is_tech_guy"] else _NO_BADGE
+    )
 
+    return "".join((
+        _ROW_OPEN, row_class,
+        _ROW_QC, str(qc),
+        _ROW_CALL, callsign,
+        _ROW_LINK, callsign,
+        _ROW_NAME, name, badge,
+        _ROW_DATE, date,
+        _ROW_CLOSE,
+    ))
 
-def generate_html(members: list[dict]) -> str:
-    now = datetime.now(timezone.utc).strftime("%B %d, %Y at %H:%M UTC")
-    count = len(members)
-    count_text = f"{count} Member{'s' if count != 1 else ''}"
-    member_rows = "\n".join(render_member_row(m) for m in members)
 
-    return f"""<!DOCTYPE html>
+# Page skeleton for roster.html; filled in with str.format, so literal braces
+# in the CSS are doubled.
+_TEMPLATE = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -569,6 +675,15 @@ def generate_html(members: list[dict]) -> str:
 """
 
 
+def generate_html(members: list[dict]) -> str:
+    now = datetime.now(timezone.utc).strftime("%B %d, %Y at %H:%M UTC")
+    count = len(members)
+    count_text = f"{count} Member{'s' if count != 1 else ''}"
+    member_rows = "\n".join(render_member_row(m) for m in members)
+
+    return _TEMPLATE.format(count_text=count_text, now=now, member_rows=member_rows)
+
+
 def main() -> int:
     print("Fetching roster CSV...")
     try:
@@ -577,6 +692,11 @@ def main() -> int:
         print(f"ERROR: Failed to fetch CSV: {e}", file=sys.stderr)
         return 1
 
+    digest = roster_digest(csv_text)
+    if os.path.exists(OUTPUT_FILE) and _read_text(DIGEST_FILE).strip() == digest:
+        print("roster.html up to date")
+        return 0
+
     members = parse_members(csv_text)
     if not members:
         print("ERROR: No members parsed from CSV", file=sys.stderr)
@@ -587,10 +707,18 @@ def main() -> int:
     members = resolve_callsign_changes(members)
 
     html = generate_html(members)
-    with open("roster.html", "w") as f:
-        f.write(html)
-
-    print("Generated roster.html")
+    payload = html.encode("utf-8")
+    _write_atomic(OUTPUT_FILE, payload)
+    # Pre-compressed copy for servers that serve .gz siblings directly
+    # (e.g. nginx "gzip_static on;"); mtime=0 keeps it reproducible.
+    _write_atomic(OUTPUT_FILE + ".gz", gzip.compress(payload, compresslevel=9, mtime=0))
+    # Strong validator for the page, for a server to send as its ETag header.
+    etag = '"' + hashlib.sha256(payload).hexdigest()[:32] + '"'
+    _write_atomic(OUTPUT_FILE + ".etag", etag.encode("utf-8"))
+    # Re-hash: QRZ lookups above may have added to the cache.
+    _write_atomic(DIGEST_FILE, roster_digest(csv_text).encode("utf-8"))
+
+    print(f"Generated roster.html (ETag {etag}) and roster.html.gz")
     return 0
 
 
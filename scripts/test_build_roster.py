@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""Unit tests for scripts/build-roster.py (run: python3 -m unittest discover scripts)."""
+
+import contextlib
+import gzip
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import urllib.error
+from unittest import mock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+_spec = importlib.util.spec_from_file_location("build_roster", os.path.join(HERE, "build-roster.py"))
+roster = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(roster)
+
+SHEET_CSV = (
+    "QRQ Crew Roster,,,\r\n"
+    ",,,\r\n"
+    "QC #,Callsign,Name,Join Date\r\n"
+    "2,W6JSV,Jay,12/31/2025\r\n"
+    "1,k1ab,Al & Bo,01/05/2024\r\n"
+    "3,K2EJT,Skipped,1/1/2020\r\n"
+    ",N0QC,No Number,1/1/2020\r\n"
+)
+
+NO_QRZ = {"QRZ_USERNAME": "", "QRZ_PASSWORD": ""}
+
+
+class FakeResponse:
+    """Stands in for the object urllib.request.urlopen returns."""
+
+    def __init__(self, body, headers=None):
+        self._body = body
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def read(self):
+        return self._body
+
+
+def not_modified(req, timeout=None):
+    raise urllib.error.HTTPError(req.full_url, 304, "Not Modified", {}, None)
+
+
+class TempPathsMixin:
+    """Point every file build-roster.py reads or writes into a temp dir."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        paths = {
+            "CACHE_FILE": "qrz_cache.json",
+            "CSV_CACHE_FILE": "cache/roster.csv",
+            "ETAG_FILE": "cache/roster.etag",
+            "LAST_MODIFIED_FILE": "cache/roster.lastmod",
+            "DIGEST_FILE": "cache/roster.sha256",
+            "OUTPUT_FILE": "roster.html",
+        }
+        for attr, name in paths.items():
+            patcher = mock.patch.object(roster, attr, os.path.join(self.tmp, name))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.dict(os.environ, NO_QRZ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestFetchCsv(TempPathsMixin, unittest.TestCase):
+    def fetch(self, urlopen):
+        with mock.patch.object(roster.urllib.request, "urlopen", urlopen), \
+                contextlib.redirect_stdout(io.StringIO()):
+            return roster.fetch_csv()
+
+    def test_200_then_304_uses_cache(self):
+        first = FakeResponse(
+            SHEET_CSV.encode("utf-8"),
+            {"ETag": '"v1"', "Last-Modified": "Mon, 05 Oct 2026 12:00:00 GMT"},
+        )
+        self.assertEqual(self.fetch(lambda req, timeout=None: first), SHEET_CSV)
+
+        seen = []
+
+        def urlopen(req, timeout=None):
+            seen.append(req)
+            return not_modified(req)
+
+        self.assertEqual(self.fetch(urlopen), SHEET_CSV)
+        self.assertEqual(seen[0].get_header("If-none-match"), '"v1"')
+        self.assertEqual(seen[0].get_header("If-modified-since"), "Mon, 05 Oct 2026 12:00:00 GMT")
+
+    def test_gzip_response_is_decoded_and_cached(self):
+        resp = FakeResponse(gzip.compress(SHEET_CSV.encode("utf-8")), {"Content-Encoding": "gzip", "ETag": '"v2"'})
+        seen = []
+
+        def urlopen(req, timeout=None):
+            seen.append(req)
+            return resp
+
+        self.assertEqual(self.fetch(urlopen), SHEET_CSV)
+        self.assertEqual(seen[0].get_header("Accept-encoding"), "gzip")
+        self.assertEqual(self.fetch(not_modified), SHEET_CSV)
+
+    def test_empty_cache_sends_no_validators(self):
+        seen = []
+
+        def urlopen(req, timeout=None):
+            seen.append(req)
+            return FakeResponse(SHEET_CSV.encode("utf-8"))
+
+        self.fetch(urlopen)
+        self.assertFalse(seen[0].has_header("If-none-match"))
+        self.assertFalse(seen[0].has_header("If-modified-since"))
+
+    def test_undecodable_body_is_not_cached(self):
+        bad = FakeResponse(b"QC #,Callsign\n1,\xff\xfe\n", {"ETag": '"bad"'})
+        with self.assertRaises(UnicodeDecodeError):
+            self.fetch(lambda req, timeout=None: bad)
+        self.assertFalse(os.path.exists(roster.CSV_CACHE_FILE))
+
+        seen = []
+
+        def urlopen(req, timeout=None):
+            seen.append(req)
+            return FakeResponse(SHEET_CSV.encode("utf-8"))
+
+        self.assertEqual(self.fetch(urlopen), SHEET_CSV)
+        self.assertFalse(seen[0].has_header("If-none-match"))
+
+    def test_undecodable_cache_is_a_miss(self):
+        os.makedirs(os.path.dirname(roster.CSV_CACHE_FILE))
+        with open(roster.CSV_CACHE_FILE, "wb") as f:
+            f.write(b"\xff\xfe")
+        with open(roster.ETAG_FILE, "w") as f:
+            f.write('"old"')
+        resp = FakeResponse(SHEET_CSV.encode("utf-8"))
+        self.assertEqual(self.fetch(lambda req, timeout=None: resp), SHEET_CSV)
+
+    def test_304_without_cache_raises(self):
+        with self.assertRaises(urllib.error.HTTPError):
+            self.fetch(not_modified)
+
+
+
+class TestRegeneration(TempPathsMixin, unittest.TestCase):
+    def run_main(self, csv_text):
+        with mock.patch.object(roster, "fetch_csv", lambda: csv_text), \
+                contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(roster.main(), 0)
+        return out.getvalue()
+
+    def read_output(self):
+        with open(roster.OUTPUT_FILE) as f:
+            return f.read()
+
+    def test_unchanged_inputs_skip_render(self):
+        self.assertIn("Generated", self.run_main(SHEET_CSV))
+
+        with open(roster.OUTPUT_FILE, "w") as f:
+            f.write("sentinel")
+        self.assertIn("up to date", self.run_main(SHEET_CSV))
+        self.assertEqual(self.read_output(), "sentinel")
+
+    def test_gzip_copy_matches_page(self):
+        self.run_main(SHEET_CSV)
+        with open(roster.OUTPUT_FILE, "rb") as f, gzip.open(roster.OUTPUT_FILE + ".gz") as g:
+            self.assertEqual(g.read(), f.read())
+
+    def test_etag_is_quoted_sha256_prefix(self):
+        self.run_main(SHEET_CSV)
+        with open(roster.OUTPUT_FILE, "rb") as f, open(roster.OUTPUT_FILE + ".etag") as e:
+            self.assertEqual(e.read(), '"' + hashlib.sha256(f.read()).hexdigest()[:32] + '"')
+
+    def test_changed_csv_rebuilds(self):
+        self.run_main(SHEET_CSV)
+        self.run_main(SHEET_CSV + "4,N0NEW,New,2/3/2026\r\n")
+        self.assertIn("N0NEW", self.read_output())
+
+    def test_missing_output_rebuilds(self):
+        self.run_main(SHEET_CSV)
+        os.remove(roster.OUTPUT_FILE)
+        self.assertIn("Generated", self.run_main(SHEET_CSV))
+
+    def test_qrz_credentials_change_digest(self):
+        without = roster.roster_digest(SHEET_CSV)
+        with mock.patch.dict(os.environ, {"QRZ_USERNAME": "user", "QRZ_PASSWORD": "pass"}):
+            self.assertNotEqual(roster.roster_digest(SHEET_CSV), without)
+
+
+class TestRender(unittest.TestCase):
+    CSV = (
+        "QC #,Callsign,Name,Join Date\n"
+        '1,K1AB,"Al & Bo <x> ""q""",1/5/2024\n'
+        "5,w6jsv,Jay,12/31/2025\n"
+        "7,N0CALL,Plain,2/3/2026\n"
+    )
+
+    def rows(self):
+        return {m["qc_number"]: roster.render_member_row(m) for m in roster.parse_members(self.CSV)}
+
+    def test_founder_row(self):
+        row = self.rows()[1]
+        self.assertIn('<div class="member-row founder">', row)
+        self.assertIn('<span class="founder-badge">Founder</span>', row)
+
+    def test_tech_guy_row(self):
+        row = self.rows()[5]
+        self.assertIn('<div class="member-row tech-guy">', row)
+        self.assertIn('<span class="tech-badge">Resident Computer Guy</span>', row)
+
+    def test_founder_styling_wins_over_tech_guy(self):
+        member = roster.parse_members("QC #,Callsign,Name,Join Date\n2,W6JSV,Jay,1/5/2024\n")[0]
+        self.assertIn('<div class="member-row founder">', roster.render_member_row(member))
+
+    def test_plain_row(self):
+        row = self.rows()[7]
+        self.assertIn('<div class="member-row ">', row)
+        self.assertNotIn("badge", row)
+        self.assertIn('<a href="https://www.qrz.com/db/N0CALL" target="_blank" rel="noopener">N0CALL</a>', row)
+
+    def test_escaping(self):
+        row = self.rows()[1]
+        self.assertIn("Al &amp; Bo &lt;x&gt; &quot;q&quot;", row)
+        self.assertNotIn("<x>", row)
+
+    def test_escapes_single_quotes(self):
+        member = roster.parse_members("QC #,Callsign,Name,Join Date\n9,EI1AB,Pat O'Brien,1/5/2024\n")[0]
+        self.assertIn("Pat O&#x27;Brien", roster.render_member_row(member))
+
+    def test_generate_html(self):
+        html = roster.generate_html(roster.parse_members(self.CSV))
+        self.assertIn('<span class="member-count">3 Members</span>', html)
+        self.assertIn("QC #5</span>", html)
+        self.assertTrue(html.rstrip().endswith("</html>"))
+
+
+
+class TestTechGuyFlag(TempPathsMixin, unittest.TestCase):
+    def test_set_while_parsing(self):
+        members = roster.parse_members("QC #,Callsign,Name,Join Date\n4,w6jsv,Jay,1/5/2024\n5,K1AB,Al,1/5/2024\n")
+        self.assertEqual([m["is_tech_guy"] for m in members], [True, False])
+
+    def test_refreshed_on_callsign_change(self):
+        with open(roster.CACHE_FILE, "w") as f:
+            json.dump({"K1OLD": {"call": "W6JSV"}, "W6JSV": {"call": "K6NEW"}}, f)
+        members = roster.parse_members("QC #,Callsign,Name,Join Date\n4,K1OLD,A,1/5/2024\n5,W6JSV,B,1/5/2024\n")
+        with contextlib.redirect_stdout(io.StringIO()):
+            members = roster.resolve_callsign_changes(members)
+        self.assertEqual([(m["callsign"], m["is_tech_guy"]) for m in members], [("W6JSV", True), ("K6NEW", False)])
+
+
+
+class TestFormatDate(unittest.TestCase):
+    def test_formats(self):
+        self.assertEqual(roster.format_date("01/05/2024"), "Jan 5, 2024")
+        self.assertEqual(roster.format_date("12/31/2025"), "Dec 31, 2025")
+
+    def test_invalid_month_unchanged(self):
+        self.assertEqual(roster.format_date("13/01/2025"), "13/01/2025")
+        self.assertEqual(roster.format_date("0/01/2025"), "0/01/2025")
+
+    def test_not_a_date_unchanged(self):
+        for value in ("", "bad", "2024-01-05", "1/5", "1/5/2024 10:00"):
+            self.assertEqual(roster.format_date(value), value)
+
+
+
+class TestParseMembers(unittest.TestCase):
+    def test_skips_title_rows_and_filters(self):
+        members = roster.parse_members(SHEET_CSV)
+        self.assertEqual([m["callsign"] for m in members], ["k1ab", "W6JSV"])
+        self.assertEqual(members[0]["name"], "Al & Bo")
+        self.assertEqual(members[0]["join_date"], "01/05/2024")
+
+    def test_no_header(self):
+        self.assertEqual(roster.parse_members("a,b\n1,2\n"), [])
+
+    def test_missing_required_column(self):
+        self.assertEqual(roster.parse_members("Callsign,Name,Join Date\nK1AB,Al,1/2/2024\n"), [])
+
+    def test_missing_optional_columns_render_blank(self):
+        members = roster.parse_members("QC #,Callsign\n1,K1AB\n")
+        self.assertEqual(members[0]["name"], "")
+        self.assertEqual(members[0]["join_date"], "")
+
+    def test_short_rows_skipped(self):
+        csv_text = "QC #,Callsign,Name,Join Date\n2\n\n3,K3CD,Cy,1/2/2024\n"
+        self.assertEqual([m["callsign"] for m in roster.parse_members(csv_text)], ["K3CD"])
+
+    def test_short_row_with_required_columns_kept(self):
+        members = roster.parse_members("QC #,Callsign,Name,Join Date\n1,K1AB\n")
+        self.assertEqual([(m["callsign"], m["name"]) for m in members], [("K1AB", "")])
+
+
+
+class TestWriteAtomic(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def test_replaces_file(self):
+        path = os.path.join(self.tmp, "sub", "out.html")
+        roster._write_atomic(path, b"old")
+        roster._write_atomic(path, "caf\u00e9".encode("utf-8"))
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), "caf\u00e9".encode("utf-8"))
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["out.html"])
+
+    def test_failed_replace_cleans_up(self):
+        path = os.path.join(self.tmp, "out.html")
+        with mock.patch.object(roster.os, "replace", side_effect=OSError("boom")):
+            with self.assertRaises(OSError):
+                roster._write_atomic(path, b"data")
+        self.assertEqual(os.listdir(self.tmp), [])
+
+
+if __name__ == "__main__":
+    unittest.main()